@@ -1,9 +1,11 @@
 # tools/make_pubs_md.py
 from __future__ import annotations
+import pickle
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 ROOT = Path(__file__).resolve().parents[1]
 BIB_FILES = [
@@ -11,101 +13,174 @@ BIB_FILES = [
     ROOT / "bibliography" / "manual.bib",
 ]
 OUT_MD = ROOT / "publications_by_year.md"
+CACHE_PKL = ROOT / "tools" / ".pubs_cache.pkl"
+
+_WS_RE = re.compile(r"\s+")
+_YEAR_RE = re.compile(r"\d{4}")
+_MONTH_NUM_RE = re.compile(r"\d{1,2}")
+_MONTH_MAP = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_TRAILING_DOT_RE = re.compile(r"\.\s*$")
+_BRACE_RE = re.compile(rb"[{}]")
+_STR_BRACE_RE = re.compile(r"[{}]")
+_HEADER_RE = re.compile(r"^@(\w+)\s*\{\s*([^,]+)\s*,", re.IGNORECASE)
 
 # ------------ Minimal BibTeX parsing (robust enough for DBLP + manual) ------------
 
-@dataclass
+@dataclass(slots=True)
 class BibEntry:
     key: str
     entry_type: str
     fields: Dict[str, str]
-
-def _strip_outer_braces_or_quotes(s: str) -> str:
-    s = s.strip()
-    if len(s) >= 2:
-        if (s[0] == "{" and s[-1] == "}") or (s[0] == '"' and s[-1] == '"'):
-            return s[1:-1].strip()
-    return s
+    # Filled in once by parse_bib_file; see _time_sort_key_desc
+    year: Optional[int] = None
+    month: int = 0
+    title_lc: str = ""
+    venue_lc: str = ""
+    sort_key: Tuple[int, int, str, str] = (0, 0, "", "")
 
 def _unescape_latex(s: str) -> str:
+    # Field values are stored already stripped, so accessors below use them as-is.
     # Minimal cleanup for common cases; keep LaTeX mostly as-is to avoid breaking names.
-    s = s.replace("\\&", "&")
-    s = re.sub(r"\s+", " ", s).strip()
+    s = s.strip()
+    if "\\&" in s:
+        s = s.replace("\\&", "&")
+    # Only run the regex if there is something to collapse: a double space, or any
+    # whitespace other than a plain space (tabs, newlines, NBSP... are not printable).
+    if "  " in s or not s.isprintable():
+        s = _WS_RE.sub(" ", s)
     return s
 
-def _split_entries(bib_text: str) -> List[str]:
-    # Split on lines starting with '@', keep content. Works for typical BibTeX.
-    # We do a simple scan to keep balanced braces.
+def _split_entries(data: bytes) -> List[bytes]:
+    # Split on '@', keep content. Works for typical BibTeX.
+    # Structural chars (@ { }) are ASCII, so we scan the raw bytes and only
+    # visit brace positions instead of every character. Entries stay undecoded.
     entries = []
     i = 0
-    n = len(bib_text)
+    n = len(data)
     while i < n:
-        at = bib_text.find("@", i)
+        at = data.find(b"@", i)
         if at == -1:
             break
         # find first '{' after '@'
-        lb = bib_text.find("{", at)
+        lb = data.find(b"{", at)
         if lb == -1:
             break
         # scan until matching closing brace at top level
         depth = 0
-        j = lb
-        while j < n:
-            c = bib_text[j]
-            if c == "{":
+        for bm in _BRACE_RE.finditer(data, lb):
+            if bm.group() == b"{":
                 depth += 1
-            elif c == "}":
+            else:
                 depth -= 1
                 if depth == 0:
                     # include until this brace
-                    entries.append(bib_text[at : j + 1].strip())
+                    j = bm.start()
+                    entries.append(data[at : j + 1])
                     i = j + 1
                     break
-            j += 1
         else:
             # unmatched braces; stop
             break
     return entries
 
+def _scan_fields(body: str) -> Dict[str, str]:
+    # Single left-to-right pass over `key = value` pairs. Values may be {braced}
+    # (any nesting depth), "quoted", or bare (numbers / macros like `sep`).
+    fields: Dict[str, str] = {}
+    i = 0
+    n = len(body)
+    while i < n:
+        # skip separators between fields
+        while i < n and (body[i] == "," or body[i].isspace()):
+            i += 1
+        ks = i
+        while i < n and (body[i].isalnum() or body[i] in "_-"):
+            i += 1
+        k = body[ks:i]
+        while i < n and body[i].isspace():
+            i += 1
+        if not k or i >= n or body[i] != "=":
+            # malformed field; resync at the next comma
+            nxt = body.find(",", i)
+            if nxt == -1:
+                break
+            i = nxt + 1
+            continue
+        i += 1
+        while i < n and body[i].isspace():
+            i += 1
+        if i >= n:
+            break
+
+        c = body[i]
+        if c == "{":
+            # jump between brace positions; unbalanced values run to the end
+            depth = 0
+            j = n
+            for bm in _STR_BRACE_RE.finditer(body, i):
+                if bm.group() == "{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        j = bm.start()
+                        break
+            v = body[i + 1 : j]
+            i = j + 1
+        elif c == '"':
+            j = body.find('"', i + 1)
+            if j == -1:
+                j = n
+            v = body[i + 1 : j]
+            i = j + 1
+        else:
+            j = body.find(",", i)
+            if j == -1:
+                j = n
+            v = body[i:j]
+            i = j
+        fields[k.lower()] = _unescape_latex(v)
+    return fields
+
 def parse_bib_file(path: Path) -> List[BibEntry]:
     if not path.exists():
         return []
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    raw_entries = _split_entries(text)
+    raw_entries = _split_entries(path.read_bytes())
     parsed: List[BibEntry] = []
 
-    header_re = re.compile(r"^@(\w+)\s*\{\s*([^,]+)\s*,", re.IGNORECASE)
-    field_re = re.compile(r"(\w+)\s*=\s*(\{(?:[^{}]|\{[^{}]*\})*\}|\"[^\"]*\"|[^,]+)\s*,?", re.DOTALL)
-
-    for e in raw_entries:
-        m = header_re.search(e)
+    for raw in raw_entries:
+        e = raw.decode("utf-8", errors="ignore")
+        m = _HEADER_RE.search(e)
         if not m:
             continue
         entry_type = m.group(1).lower()
         key = m.group(2).strip()
 
-        # fields area: after first comma following key, until last '}'
+        # fields area: after first comma following key, until the entry's closing '}'
         start = e.find(",", m.end(2))
         if start == -1:
             continue
-        body = e[start + 1 :].rstrip("}").strip()
+        body = e[start + 1 : -1]
 
-        fields: Dict[str, str] = {}
-        for fm in field_re.finditer(body):
-            k = fm.group(1).lower()
-            v = fm.group(2).strip()
-            v = _strip_outer_braces_or_quotes(v)
-            v = _unescape_latex(v)
-            fields[k] = v
-        parsed.append(BibEntry(key=key, entry_type=entry_type, fields=fields))
+        fields = _scan_fields(body)
+        ent = BibEntry(key=key, entry_type=entry_type, fields=fields)
+        ent.year = _get_year(ent)
+        ent.month = _get_month(ent)
+        ent.title_lc = _title(ent).lower()
+        ent.venue_lc = _venue(ent).lower()
+        ent.sort_key = _time_sort_key_desc(ent)
+        parsed.append(ent)
 
     return parsed
 
 # ------------ Formatting ------------
 
 def _get_year(entry: BibEntry) -> Optional[int]:
-    y = entry.fields.get("year", "").strip()
-    m = re.search(r"\d{4}", y)
+    y = entry.fields.get("year", "")
+    m = _YEAR_RE.search(y)
     if not m:
         return None
     try:
@@ -118,34 +193,22 @@ def _get_month(entry: BibEntry) -> int:
     Return month as 1-12 if available; otherwise 0.
     Accepts numeric month, abbreviations (jan/feb/...), or full month names.
     """
-    m = entry.fields.get("month", "").strip().lower()
+    m = entry.fields.get("month", "")
     if not m:
         return 0
 
+    # textual month: "jan", "January", "sept" all share their first three letters
+    val = _MONTH_MAP.get(m[:3].lower())
+    if val:
+        return val
+
     # numeric month
-    m_num = re.search(r"\d{1,2}", m)
+    m_num = _MONTH_NUM_RE.search(m)
     if m_num:
         val = int(m_num.group(0))
         if 1 <= val <= 12:
             return val
-
-    # textual month
-    month_map = {
-        "jan": 1, "january": 1,
-        "feb": 2, "february": 2,
-        "mar": 3, "march": 3,
-        "apr": 4, "april": 4,
-        "may": 5,
-        "jun": 6, "june": 6,
-        "jul": 7, "july": 7,
-        "aug": 8, "august": 8,
-        "sep": 9, "sept": 9, "september": 9,
-        "oct": 10, "october": 10,
-        "nov": 11, "november": 11,
-        "dec": 12, "december": 12,
-    }
-    # month may be like "{Jan}" already stripped, so just map directly
-    return month_map.get(m, 0)
+    return 0
 
 def _time_sort_key_desc(entry: BibEntry) -> Tuple[int, int, str, str]:
     """
@@ -153,12 +216,10 @@ def _time_sort_key_desc(entry: BibEntry) -> Tuple[int, int, str, str]:
     (year, month, venue, title) in descending for year/month,
     venue/title in ascending to stabilize.
     """
-    y = _get_year(entry) or 0
-    mo = _get_month(entry)
-    return (y, mo, _venue(entry).lower(), _title(entry).lower())
+    return (entry.year or 0, entry.month, entry.venue_lc, entry.title_lc)
 
 def _authors(entry: BibEntry) -> str:
-    a = entry.fields.get("author", "").strip()
+    a = entry.fields.get("author", "")
     if not a:
         return ""
     # Keep BibTeX "and" but turn into comma-separated for readability
@@ -166,24 +227,21 @@ def _authors(entry: BibEntry) -> str:
     return ", ".join(parts)
 
 def _title(entry: BibEntry) -> str:
-    t = entry.fields.get("title", "").strip()
+    t = entry.fields.get("title", "")
     # remove trailing period sometimes from DBLP
-    t = re.sub(r"\.\s*$", "", t)
+    t = _TRAILING_DOT_RE.sub("", t)
     return t
 
 def _venue(entry: BibEntry) -> str:
     # Prefer journal, else booktitle
-    j = entry.fields.get("journal", "").strip()
-    b = entry.fields.get("booktitle", "").strip()
-    v = j if j else b
     # Some DBLP booktitle includes "Proceedings of ..." – keep as-is
-    return v
+    return entry.fields.get("journal") or entry.fields.get("booktitle", "")
 
 def _extra_links(entry: BibEntry) -> List[Tuple[str, str]]:
     links: List[Tuple[str, str]] = []
-    doi = entry.fields.get("doi", "").strip()
-    url = entry.fields.get("url", "").strip()
-    ee = entry.fields.get("ee", "").strip()  # DBLP sometimes provides 'ee' external link
+    doi = entry.fields.get("doi", "")
+    url = entry.fields.get("url", "")
+    ee = entry.fields.get("ee", "")  # DBLP sometimes provides 'ee' external link
 
     if doi:
         links.append(("DOI", f"https://doi.org/{doi}"))
@@ -199,32 +257,97 @@ def format_item(entry: BibEntry) -> str:
     a = _authors(entry)
     t = _title(entry)
     v = _venue(entry)
-    y = entry.fields.get("year", "").strip()
-
-    pieces = []
-    if a:
-        pieces.append(a)
-    if t:
-        pieces.append(f"“{t}”")
-    if v:
-        pieces.append(f"*{v}*")
-    if y:
-        pieces.append(y)
-
-    s = ". ".join(pieces).strip().rstrip(".")
+    y = entry.fields.get("year", "")
+
+    if a and t and v and y:
+        # common case: every piece present, fields are already trimmed
+        s = f"{a}. “{t}”. *{v}*. {y.rstrip('.')}"
+    else:
+        pieces = []
+        if a:
+            pieces.append(a)
+        if t:
+            pieces.append(f"“{t}”")
+        if v:
+            pieces.append(f"*{v}*")
+        if y:
+            pieces.append(y)
+        s = ". ".join(pieces).strip().rstrip(".")
+
     links = _extra_links(entry)
     if links:
-        link_str = ", ".join([f"[{name}]({href})" for name, href in links])
+        link_str = ", ".join(f"[{name}]({href})" for name, href in links)
         s = f"{s}. {link_str}"
     return f"- {s}"
 
-def main():
+def _emit(
+    years: List[int],
+    grouped: Dict[int, List[BibEntry]],
+    before_2020: List[BibEntry],
+    no_year: List[BibEntry],
+) -> Iterator[str]:
+    # normal years (>=2020)
+    sections = [(f"### {y}", grouped[y]) for y in years]
+    # before 2020 group: numbered "第一篇/第二篇..."
+    if before_2020:
+        sections.append(("### Before 2020", before_2020))
+    # keep no-year items if any
+    if no_year:
+        sections.append(("### Others (no year)", no_year))
+
+    # sections are separated by one blank line, with no trailing blank line
+    for n, (heading, entries) in enumerate(sections):
+        if n:
+            yield "\n"
+        yield heading + "\n"
+        for e in entries:
+            yield format_item(e) + "\n"
+
+# ------------ Parsed-entry cache ------------
+
+def _bib_signature() -> Tuple[Optional[Tuple[int, int]], ...]:
+    # (mtime, size) of every input; this script is included so parser changes invalidate too
+    sig = []
+    for p in [*BIB_FILES, Path(__file__)]:
+        if p.exists():
+            st = p.stat()
+            sig.append((st.st_mtime_ns, st.st_size))
+        else:
+            sig.append(None)
+    return tuple(sig)
+
+def load_entries() -> Dict[str, BibEntry]:
+    sig = _bib_signature()
+    if CACHE_PKL.exists():
+        try:
+            with CACHE_PKL.open("rb") as f:
+                cache = pickle.load(f)
+            if cache["sig"] == sig:
+                return cache["entries"]
+        except Exception:
+            # stale or unreadable cache; just re-parse
+            pass
+
     all_entries: Dict[str, BibEntry] = {}
 
-    for bf in BIB_FILES:
-        for e in parse_bib_file(bf):
-            # Later files override earlier ones for same key (manual can override dblp if needed)
-            all_entries[e.key] = e
+    # Files are independent; parse them concurrently. ex.map keeps BIB_FILES order.
+    with ThreadPoolExecutor(max_workers=len(BIB_FILES)) as ex:
+        results = list(ex.map(parse_bib_file, BIB_FILES))
+
+    # Later files override earlier ones for same key (manual can override dblp if needed)
+    for entries in results:
+        all_entries |= {e.key: e for e in entries}
+
+    try:
+        with CACHE_PKL.open("wb") as f:
+            pickle.dump({"sig": sig, "entries": all_entries}, f, protocol=5)
+    except (OSError, pickle.PicklingError):
+        # cache is best-effort only
+        CACHE_PKL.unlink(missing_ok=True)
+    return all_entries
+
+def main():
+    all_entries = load_entries()
 
     # Group by year, but put <2020 into one bucket
     grouped: Dict[int, List[BibEntry]] = {}
@@ -232,7 +355,7 @@ def main():
     no_year: List[BibEntry] = []
 
     for e in all_entries.values():
-        y = _get_year(e)
+        y = e.year
         if y is None:
             no_year.append(e)
             continue
@@ -248,39 +371,17 @@ def main():
     # Python sort is ascending, so we sort by key and set reverse=True for year/month effect.
     # We'll build a key and reverse, but venue/title should remain stable; simplest:
     for y in years:
-        grouped[y].sort(key=_time_sort_key_desc, reverse=True)
+        grouped[y].sort(key=lambda x: x.sort_key, reverse=True)
 
     # Sort before_2020 bucket also by time descending
-    before_2020.sort(key=_time_sort_key_desc, reverse=True)
+    before_2020.sort(key=lambda x: x.sort_key, reverse=True)
 
     # Sort no_year bucket (optional)
-    no_year.sort(key=lambda x: (_title(x).lower(), x.key.lower()))
-
-    # Write markdown
-    lines: List[str] = []
-
-    # normal years (>=2020)
-    for y in years:
-        lines.append(f"### {y}")
-        for e in grouped[y]:
-            lines.append(format_item(e))
-        lines.append("")
-
-    # before 2020 group: numbered "第一篇/第二篇..."
-    if before_2020:
-        lines.append("### Before 2020")
-        for e in before_2020:
-            lines.append(format_item(e))
-        lines.append("")
-
-    # keep no-year items if any
-    if no_year:
-        lines.append("### Others (no year)")
-        for e in no_year:
-            lines.append(format_item(e))
-        lines.append("")
+    no_year.sort(key=lambda x: (x.title_lc, x.key.lower()))
 
-    OUT_MD.write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
+    # Write markdown, one formatted entry at a time
+    with OUT_MD.open("w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(_emit(years, grouped, before_2020, no_year))
     print(f"Wrote: {OUT_MD}")
 
 if __name__ == "__main__":